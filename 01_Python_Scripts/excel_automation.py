@@ -10,12 +10,56 @@ import numpy as np
 from openpyxl import Workbook, load_workbook
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.chart import BarChart, LineChart, PieChart, Reference
+from openpyxl.utils import get_column_letter
 from openpyxl.utils.dataframe import dataframe_to_rows
 from openpyxl.worksheet.table import Table, TableStyleInfo
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import warnings
 warnings.filterwarnings('ignore')
 
+# Shared cell styles, built once at import; reusing these instead of
+# constructing new style objects per cell keeps openpyxl's style table small
+TITLE_FONT = Font(size=16, bold=True)
+SUBTITLE_FONT = Font(size=12, italic=True)
+SECTION_FONT = Font(size=14, bold=True)
+LABEL_FONT = Font(size=12, bold=True)
+BOLD_FONT = Font(bold=True)
+WHITE_BOLD_FONT = Font(color="FFFFFF", bold=True)
+HEADER_FILL = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+THIN_BORDER = Border(
+    left=Side(style='thin'),
+    right=Side(style='thin'),
+    top=Side(style='thin'),
+    bottom=Side(style='thin')
+)
+CENTER_ALIGN = Alignment(horizontal='center', vertical='center')
+
+# Client presentation color scheme
+BRAND_TITLE_FONT = Font(size=20, bold=True, color="FFFFFF")
+BRAND_FILL = PatternFill(start_color="1F4E79", end_color="1F4E79", fill_type="solid")
+BRAND_SUBTITLE_FONT = Font(size=14, italic=True, color="1F4E79")
+BRAND_SECTION_FONT = Font(size=16, bold=True, color="1F4E79")
+FOOTNOTE_FONT = Font(size=10, color="666666")
+BODY_FONT = Font(size=11)
+
+# Number formats for raw numeric cells; Excel renders the formatting so the
+# underlying values stay numeric and sortable
+CURRENCY_FORMAT = '"$"#,##0.00'
+PERCENT_FORMAT = '0.00%'
+PERCENT_1DP_FORMAT = '0.0%'
+DECIMAL_FORMAT = '0.00'
+DECIMAL_1DP_FORMAT = '0.0'
+
+# Superset Policy Type aggregation shared by the executive summary and the
+# detailed policy performance sheet; each caller slices the columns it needs
+POLICY_TYPE_AGG = {
+    'Premium Amount': ['count', 'sum', 'mean', 'std'],
+    'Previous Claims': ['sum', 'mean'],
+    'Loss Ratio': ['mean', 'std'],
+    'Customer Value': ['sum']
+}
+
 class ExcelAutomation:
     def __init__(self, data_path):
         """Initialize Excel automation"""
@@ -23,27 +67,36 @@ class ExcelAutomation:
         self.df = None
         self.processed_df = None
         self.workbook = None
+        self._agg_cache = {}
         
     def load_and_prepare_data(self):
         """Load and prepare data for Excel reports"""
         print("Loading data for Excel automation...")
-        self.df = pd.read_csv(self.data_path)
-        
-        # Clean and prepare data
-        df = self.df.copy()
-        
-        # Handle missing values
-        df['Age'] = df['Age'].fillna(df['Age'].median())
-        df['Annual Income'] = df['Annual Income'].fillna(df['Annual Income'].median())
-        df['Number of Dependents'] = df['Number of Dependents'].fillna(0)
-        df['Health Score'] = df['Health Score'].fillna(df['Health Score'].median())
-        df['Previous Claims'] = df['Previous Claims'].fillna(0)
-        df['Credit Score'] = df['Credit Score'].fillna(df['Credit Score'].median())
-        df['Customer Feedback'] = df['Customer Feedback'].fillna('Average')
+        self.df = pd.read_csv(
+            self.data_path,
+            dtype={
+                'Gender': 'category', 'Marital Status': 'category',
+                'Occupation': 'category', 'Education Level': 'category',
+                'Policy Type': 'category', 'Location': 'category',
+                'Smoking Status': 'category', 'Exercise Frequency': 'category',
+                'Age': 'float32', 'Annual Income': 'float32',
+                'Number of Dependents': 'float32', 'Health Score': 'float32',
+                'Previous Claims': 'float32', 'Credit Score': 'float32',
+                'Premium Amount': 'float32', 'Insurance Duration': 'float32'
+            },
+            parse_dates=['Policy Start Date']
+        )
         
-        # Convert dates
-        df['Policy Start Date'] = pd.to_datetime(df['Policy Start Date'])
+        # Clean and prepare data in place; the raw frame has no other consumers
+        df = self.df
         
+        # Handle missing values in one fused fillna pass
+        medians = df[['Age', 'Annual Income', 'Health Score', 'Credit Score']].median()
+        df.fillna({**medians.to_dict(),
+                   'Number of Dependents': 0,
+                   'Previous Claims': 0,
+                   'Customer Feedback': 'Average'}, inplace=True)
+
         # Create calculated columns
         df['Age Group'] = pd.cut(df['Age'], bins=[0, 25, 35, 45, 55, 65, 100], 
                                 labels=['18-25', '26-35', '36-45', '46-55', '56-65', '65+'])
@@ -53,73 +106,99 @@ class ExcelAutomation:
         
         # Risk calculation
         df['Risk Score'] = self._calculate_risk_score(df)
-        df['Risk Category'] = df['Risk Score'].apply(self._categorize_risk)
-        
-        # Premium metrics
-        df['Premium Per Year'] = df['Premium Amount'] / df['Insurance Duration']
-        df['Loss Ratio'] = (df['Previous Claims'] * 1000) / df['Premium Amount']
-        df['Loss Ratio'] = df['Loss Ratio'].fillna(0)
+        df['Risk Category'] = pd.Categorical.from_codes(
+            np.digitize(df['Risk Score'].to_numpy(), bins=[3, 5, 7]),
+            categories=['Low', 'Medium', 'High', 'Very High']
+        )
         
+        # Premium metrics from the raw arrays, pulled once; the loss ratio
+        # divide is predicated on premium > 0
+        premiums = df['Premium Amount'].to_numpy(dtype=np.float32)
+        durations = df['Insurance Duration'].to_numpy(dtype=np.float32)
+        claims = df['Previous Claims'].to_numpy(dtype=np.float32)
+        df['Premium Per Year'] = premiums / durations
+        loss_ratio = np.zeros_like(premiums)
+        np.divide(claims * 1000.0, premiums, out=loss_ratio, where=premiums != 0)
+        df['Loss Ratio'] = loss_ratio
+
         # Customer value
-        df['Customer Value'] = df['Premium Amount'] * df['Insurance Duration']
-        
+        df['Customer Value'] = premiums * durations
+
+        # Low-cardinality string columns become categoricals so every
+        # downstream groupby hashes integer codes
+        for col in ('Policy Type', 'Location', 'Smoking Status', 'Exercise Frequency',
+                    'Customer Feedback', 'Gender'):
+            df[col] = df[col].astype('category')
+
         self.processed_df = df
+        self._agg_cache.clear()
         return df
-    
+
+    def _grouped_agg(self, key, spec):
+        """Run a groupby aggregation once and share it across report sheets"""
+        cache_key = (key, tuple(
+            (col, tuple(funcs) if isinstance(funcs, list) else funcs)
+            for col, funcs in spec.items()
+        ))
+        if cache_key not in self._agg_cache:
+            group_key = list(key) if isinstance(key, tuple) else key
+            self._agg_cache[cache_key] = (
+                self.processed_df.groupby(group_key, observed=True).agg(spec).round(2)
+            )
+        return self._agg_cache[cache_key].copy()
+
     def _calculate_risk_score(self, df):
         """Calculate risk score for each policy"""
-        risk_scores = []
-        
-        for _, row in df.iterrows():
-            score = 0
-            
-            # Age factor
-            if row['Age'] < 25 or row['Age'] > 65:
-                score += 2
-            elif 25 <= row['Age'] <= 35:
-                score += 1
-            
-            # Claims history
-            if row['Previous Claims'] > 2:
-                score += 3
-            elif row['Previous Claims'] > 0:
-                score += 1
-            
-            # Health score
-            if row['Health Score'] < 20:
-                score += 2
-            elif row['Health Score'] < 40:
-                score += 1
-            
-            # Credit score
-            if row['Credit Score'] < 500:
-                score += 2
-            elif row['Credit Score'] < 650:
-                score += 1
-            
-            # Smoking status
-            if row['Smoking Status'] == 'Yes':
-                score += 2
-            
-            # Exercise frequency
-            if row['Exercise Frequency'] == 'Rarely':
-                score += 1
-            
-            risk_scores.append(score)
-        
-        return risk_scores
-    
-    def _categorize_risk(self, score):
-        """Categorize risk based on score"""
-        if score <= 2:
-            return 'Low'
-        elif score <= 4:
-            return 'Medium'
-        elif score <= 6:
-            return 'High'
-        else:
-            return 'Very High'
-    
+        age = df['Age'].to_numpy()
+        claims = df['Previous Claims'].to_numpy()
+        health = df['Health Score'].to_numpy()
+        credit = df['Credit Score'].to_numpy()
+        smoker = (df['Smoking Status'] == 'Yes').to_numpy()
+        rarely_exercises = (df['Exercise Frequency'] == 'Rarely').to_numpy()
+
+        score = np.zeros(len(df), dtype=np.int8)
+
+        # Age factor
+        score += 2 * ((age < 25) | (age > 65)) + ((age >= 25) & (age <= 35))
+
+        # Claims history
+        score += 3 * (claims > 2) + ((claims > 0) & (claims <= 2))
+
+        # Health score
+        score += 2 * (health < 20) + ((health >= 20) & (health < 40))
+
+        # Credit score
+        score += 2 * (credit < 500) + ((credit >= 500) & (credit < 650))
+
+        # Smoking status and exercise frequency
+        score += 2 * smoker + rarely_exercises
+
+        return score
+
+    @staticmethod
+    def _format_last_row(ws, formats):
+        """Apply number formats to the row most recently appended to ws"""
+        for cell, fmt in zip(ws[ws.max_row], formats):
+            if fmt:
+                cell.number_format = fmt
+
+    def _compute_kpis(self, df):
+        """Compute the portfolio KPIs shared across report sheets"""
+        premiums = df['Premium Amount'].to_numpy()
+        total_policies = len(df)
+        total_premiums = premiums.sum()
+        total_claims = df['Previous Claims'].to_numpy().sum()
+        high_risk_policies = int(df['Risk Category'].isin(['High', 'Very High']).sum())
+        return {
+            'total_policies': total_policies,
+            'total_premiums': total_premiums,
+            'avg_premium': premiums.mean(),
+            'total_claims': total_claims,
+            'overall_loss_ratio': (total_claims * 1000) / total_premiums,
+            'high_risk_policies': high_risk_policies,
+            'high_risk_pct': (high_risk_policies / total_policies) * 100
+        }
+
     def create_executive_summary_report(self):
         """Create executive summary report with KPIs"""
         print("Creating executive summary report...")
@@ -134,51 +213,52 @@ class ExcelAutomation:
         ws = wb.active
         ws.title = "Executive Summary"
         
-        # Set up headers and styling
-        self._setup_worksheet_style(ws)
-        
         # Title
         ws['A1'] = "RISK & POLICY ANALYTICS DASHBOARD"
-        ws['A1'].font = Font(size=16, bold=True)
+        ws['A1'].font = TITLE_FONT
         ws.merge_cells('A1:F1')
         
         ws['A2'] = f"Executive Summary Report - {datetime.now().strftime('%B %Y')}"
-        ws['A2'].font = Font(size=12, italic=True)
+        ws['A2'].font = SUBTITLE_FONT
         ws.merge_cells('A2:F2')
         
         # Key Performance Indicators
         ws['A4'] = "KEY PERFORMANCE INDICATORS"
-        ws['A4'].font = Font(size=14, bold=True)
+        ws['A4'].font = SECTION_FONT
         ws.merge_cells('A4:F4')
         
-        # Calculate KPIs
-        total_policies = len(df)
-        total_premiums = df['Premium Amount'].sum()
-        avg_premium = df['Premium Amount'].mean()
-        total_claims = df['Previous Claims'].sum()
-        overall_loss_ratio = (df['Previous Claims'] * 1000).sum() / df['Premium Amount'].sum()
-        high_risk_policies = len(df[df['Risk Category'].isin(['High', 'Very High'])])
-        high_risk_pct = (high_risk_policies / total_policies) * 100
-        
-        # KPI Table
+        # Portfolio KPIs, shared with the client presentation report
+        kpis = self._compute_kpis(df)
+        overall_loss_ratio = kpis['overall_loss_ratio']
+        high_risk_pct = kpis['high_risk_pct']
+
+        # KPI Table; values stay numeric, Excel handles the formatting
         kpi_data = [
             ['Metric', 'Value', 'Target', 'Status'],
-            ['Total Policies', total_policies, 'N/A', 'Current'],
-            ['Total Premium Volume', f'${total_premiums:,.2f}', 'N/A', 'Current'],
-            ['Average Premium', f'${avg_premium:,.2f}', 'N/A', 'Current'],
-            ['Total Claims', total_claims, 'N/A', 'Current'],
-            ['Overall Loss Ratio', f'{overall_loss_ratio:.2%}', '<70%', 'Good' if overall_loss_ratio < 0.7 else 'Needs Attention'],
-            ['High Risk Policies', f'{high_risk_pct:.1f}%', '<20%', 'Good' if high_risk_pct < 20 else 'Needs Attention']
+            ['Total Policies', kpis['total_policies'], 'N/A', 'Current'],
+            ['Total Premium Volume', kpis['total_premiums'], 'N/A', 'Current'],
+            ['Average Premium', kpis['avg_premium'], 'N/A', 'Current'],
+            ['Total Claims', kpis['total_claims'], 'N/A', 'Current'],
+            ['Overall Loss Ratio', overall_loss_ratio, '<70%', 'Good' if overall_loss_ratio < 0.7 else 'Needs Attention'],
+            ['High Risk Policies', high_risk_pct / 100, '<20%', 'Good' if high_risk_pct < 20 else 'Needs Attention']
         ]
+        kpi_value_formats = [None, None, CURRENCY_FORMAT, CURRENCY_FORMAT,
+                             None, PERCENT_FORMAT, PERCENT_1DP_FORMAT]
         
+        # Track the widest value per column as cells are written, so the
+        # sheet never needs a full re-scan afterwards
+        col_widths = {}
+
         # Add KPI data to worksheet
         for row_idx, row_data in enumerate(kpi_data, start=6):
             for col_idx, value in enumerate(row_data, start=1):
                 cell = ws.cell(row=row_idx, column=col_idx, value=value)
+                if col_idx == 2 and kpi_value_formats[row_idx - 6]:
+                    cell.number_format = kpi_value_formats[row_idx - 6]
+                col_widths[col_idx] = max(col_widths.get(col_idx, 0), len(str(value)))
                 if row_idx == 6:  # Header row
-                    cell.font = Font(bold=True)
-                    cell.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-                    cell.font = Font(color="FFFFFF", bold=True)
+                    cell.fill = HEADER_FILL
+                    cell.font = WHITE_BOLD_FONT
         
         # Create KPI table
         kpi_table = Table(displayName="KPITable", ref=f"A6:D{6+len(kpi_data)-1}")
@@ -194,110 +274,94 @@ class ExcelAutomation:
         
         # Policy Performance Summary
         ws['A15'] = "POLICY PERFORMANCE SUMMARY"
-        ws['A15'].font = Font(size=14, bold=True)
+        ws['A15'].font = SECTION_FONT
         ws.merge_cells('A15:F15')
         
-        # Policy type performance
-        policy_performance = df.groupby('Policy Type').agg({
-            'Premium Amount': ['count', 'sum', 'mean'],
-            'Previous Claims': 'sum',
-            'Loss Ratio': 'mean'
-        }).round(2)
-        
+        # Policy type performance, sliced from the shared Policy Type aggregation
+        policy_performance = self._grouped_agg('Policy Type', POLICY_TYPE_AGG)[[
+            ('Premium Amount', 'count'), ('Premium Amount', 'sum'),
+            ('Premium Amount', 'mean'), ('Previous Claims', 'sum'),
+            ('Loss Ratio', 'mean')
+        ]]
+
         policy_performance.columns = ['Policy Count', 'Total Premiums', 'Avg Premium', 'Total Claims', 'Avg Loss Ratio']
         policy_performance = policy_performance.reset_index()
         
         # Add policy performance data
         headers = ['Policy Type', 'Policy Count', 'Total Premiums', 'Avg Premium', 'Total Claims', 'Avg Loss Ratio']
         for col_idx, header in enumerate(headers, start=1):
-            ws.cell(row=17, column=col_idx, value=header).font = Font(bold=True)
-        
-        for row_idx, (_, row) in enumerate(policy_performance.iterrows(), start=18):
-            for col_idx, value in enumerate([row['Policy Type'], row['Policy Count'], 
-                                          f"${row['Total Premiums']:,.2f}", f"${row['Avg Premium']:,.2f}", 
-                                          row['Total Claims'], f"{row['Avg Loss Ratio']:.2%}"], start=1):
-                ws.cell(row=row_idx, column=col_idx, value=value)
+            ws.cell(row=17, column=col_idx, value=header).font = BOLD_FONT
+            col_widths[col_idx] = max(col_widths.get(col_idx, 0), len(header))
+
+        performance_formats = [None, None, CURRENCY_FORMAT, CURRENCY_FORMAT, None, PERCENT_FORMAT]
+        for row_idx, row_values in enumerate(
+                policy_performance.itertuples(index=False, name=None), start=18):
+            for col_idx, (value, fmt) in enumerate(zip(row_values, performance_formats), start=1):
+                cell = ws.cell(row=row_idx, column=col_idx, value=value)
+                if fmt:
+                    cell.number_format = fmt
+                col_widths[col_idx] = max(col_widths.get(col_idx, 0), len(str(value)))
         
         # Risk Analysis
         ws['A25'] = "RISK ANALYSIS"
-        ws['A25'].font = Font(size=14, bold=True)
+        ws['A25'].font = SECTION_FONT
         ws.merge_cells('A25:F25')
         
         risk_analysis = df['Risk Category'].value_counts()
-        risk_analysis_pct = df['Risk Category'].value_counts(normalize=True) * 100
+        risk_analysis_pct = risk_analysis / risk_analysis.sum() * 100
         
         # Add risk analysis data
         risk_headers = ['Risk Category', 'Policy Count', 'Percentage']
         for col_idx, header in enumerate(risk_headers, start=1):
-            ws.cell(row=27, column=col_idx, value=header).font = Font(bold=True)
-        
+            ws.cell(row=27, column=col_idx, value=header).font = BOLD_FONT
+            col_widths[col_idx] = max(col_widths.get(col_idx, 0), len(header))
+
         for row_idx, (category, count) in enumerate(risk_analysis.items(), start=28):
             percentage = risk_analysis_pct[category]
-            ws.cell(row=row_idx, column=1, value=category)
-            ws.cell(row=row_idx, column=2, value=count)
-            ws.cell(row=row_idx, column=3, value=f"{percentage:.1f}%")
+            for col_idx, value in enumerate([category, count, percentage / 100], start=1):
+                cell = ws.cell(row=row_idx, column=col_idx, value=value)
+                if col_idx == 3:
+                    cell.number_format = PERCENT_1DP_FORMAT
+                col_widths[col_idx] = max(col_widths.get(col_idx, 0), len(str(value)))
         
         # Add charts
         self._add_executive_charts(ws, df)
         
-        # Auto-adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
-        
+        # Auto-adjust column widths from the lengths tracked while writing
+        for col_idx, max_length in col_widths.items():
+            ws.column_dimensions[get_column_letter(col_idx)].width = min(max_length + 2, 50)
+
         return wb
     
-    def _setup_worksheet_style(self, ws):
-        """Set up worksheet styling"""
-        # Define styles
-        header_font = Font(size=12, bold=True, color="FFFFFF")
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-        
-        # Apply styles to all cells
-        for row in ws.iter_rows():
-            for cell in row:
-                cell.border = border
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-    
     def _add_executive_charts(self, ws, df):
         """Add charts to executive summary"""
+        if df.empty:
+            return
+
+        # Only the row extents are needed; the chart data is read from the
+        # tables already written to the sheet
+        n_policy_types = df['Policy Type'].nunique()
+        n_risk_categories = len(df['Risk Category'].cat.categories)
+
         # Premium by Policy Type Chart
-        policy_premiums = df.groupby('Policy Type')['Premium Amount'].sum()
-        
         chart1 = BarChart()
         chart1.title = "Total Premiums by Policy Type"
         chart1.x_axis.title = "Policy Type"
         chart1.y_axis.title = "Premium Amount ($)"
         
-        data = Reference(ws, min_col=2, min_row=17, max_row=17+len(policy_premiums), max_col=3)
-        cats = Reference(ws, min_col=1, min_row=18, max_row=17+len(policy_premiums))
+        data = Reference(ws, min_col=2, min_row=17, max_row=17+n_policy_types, max_col=3)
+        cats = Reference(ws, min_col=1, min_row=18, max_row=17+n_policy_types)
         chart1.add_data(data, titles_from_data=True)
         chart1.set_categories(cats)
-        
+
         ws.add_chart(chart1, "H6")
-        
+
         # Risk Distribution Pie Chart
-        risk_counts = df['Risk Category'].value_counts()
-        
         chart2 = PieChart()
         chart2.title = "Risk Category Distribution"
-        
-        data = Reference(ws, min_col=2, min_row=27, max_row=27+len(risk_counts), max_col=2)
-        cats = Reference(ws, min_col=1, min_row=28, max_row=27+len(risk_counts))
+
+        data = Reference(ws, min_col=2, min_row=27, max_row=27+n_risk_categories, max_col=2)
+        cats = Reference(ws, min_col=1, min_row=28, max_row=27+n_risk_categories)
         chart2.add_data(data, titles_from_data=True)
         chart2.set_categories(cats)
         
@@ -341,35 +405,30 @@ class ExcelAutomation:
         
         # Title
         ws['A1'] = "POLICY PERFORMANCE ANALYSIS"
-        ws['A1'].font = Font(size=16, bold=True)
+        ws['A1'].font = TITLE_FONT
         ws.merge_cells('A1:H1')
         
-        # Policy type performance with advanced formulas
-        policy_analysis = df.groupby('Policy Type').agg({
-            'Premium Amount': ['count', 'sum', 'mean', 'std'],
-            'Previous Claims': ['sum', 'mean'],
-            'Loss Ratio': ['mean', 'std'],
-            'Customer Value': 'sum'
-        }).round(2)
+        # Policy type performance from the shared Policy Type aggregation
+        policy_analysis = self._grouped_agg('Policy Type', POLICY_TYPE_AGG)
         
         policy_analysis.columns = ['Count', 'Total Premiums', 'Avg Premium', 'Std Premium',
                                  'Total Claims', 'Avg Claims', 'Avg Loss Ratio', 'Std Loss Ratio', 'Total Value']
         policy_analysis = policy_analysis.reset_index()
         
-        # Add data to worksheet
+        # Stream rows to the sheet instead of addressing individual cells
         headers = ['Policy Type', 'Count', 'Total Premiums', 'Avg Premium', 'Std Premium',
                   'Total Claims', 'Avg Claims', 'Avg Loss Ratio', 'Std Loss Ratio', 'Total Value']
-        
-        for col_idx, header in enumerate(headers, start=1):
-            ws.cell(row=3, column=col_idx, value=header).font = Font(bold=True)
-        
-        for row_idx, (_, row) in enumerate(policy_analysis.iterrows(), start=4):
-            for col_idx, value in enumerate([row['Policy Type'], row['Count'], 
-                                          f"${row['Total Premiums']:,.2f}", f"${row['Avg Premium']:,.2f}",
-                                          f"${row['Std Premium']:,.2f}", row['Total Claims'], 
-                                          f"{row['Avg Claims']:.2f}", f"{row['Avg Loss Ratio']:.2%}",
-                                          f"{row['Std Loss Ratio']:.2%}", f"${row['Total Value']:,.2f}"], start=1):
-                ws.cell(row=row_idx, column=col_idx, value=value)
+
+        ws.append([])
+        ws.append(headers)
+        for cell in ws[3]:
+            cell.font = BOLD_FONT
+
+        row_formats = [None, None, CURRENCY_FORMAT, CURRENCY_FORMAT, CURRENCY_FORMAT,
+                       None, DECIMAL_FORMAT, PERCENT_FORMAT, PERCENT_FORMAT, CURRENCY_FORMAT]
+        for row in policy_analysis.itertuples(index=False, name=None):
+            ws.append(row)
+            self._format_last_row(ws, row_formats)
         
         # Add conditional formatting formulas
         self._add_conditional_formatting(ws, df)
@@ -380,37 +439,37 @@ class ExcelAutomation:
         
         # Title
         ws['A1'] = "RISK ANALYSIS"
-        ws['A1'].font = Font(size=16, bold=True)
+        ws['A1'].font = TITLE_FONT
         ws.merge_cells('A1:H1')
         
         # Risk category analysis
-        risk_analysis = df.groupby('Risk Category').agg({
+        risk_analysis = self._grouped_agg('Risk Category', {
             'Premium Amount': ['count', 'sum', 'mean'],
             'Previous Claims': ['sum', 'mean'],
             'Loss Ratio': 'mean',
             'Age': 'mean',
             'Health Score': 'mean',
             'Credit Score': 'mean'
-        }).round(2)
+        })
         
         risk_analysis.columns = ['Count', 'Total Premiums', 'Avg Premium', 'Total Claims',
                                'Avg Claims', 'Avg Loss Ratio', 'Avg Age', 'Avg Health Score', 'Avg Credit Score']
         risk_analysis = risk_analysis.reset_index()
         
-        # Add data to worksheet
+        # Stream rows to the sheet instead of addressing individual cells
         headers = ['Risk Category', 'Count', 'Total Premiums', 'Avg Premium', 'Total Claims',
                   'Avg Claims', 'Avg Loss Ratio', 'Avg Age', 'Avg Health Score', 'Avg Credit Score']
-        
-        for col_idx, header in enumerate(headers, start=1):
-            ws.cell(row=3, column=col_idx, value=header).font = Font(bold=True)
-        
-        for row_idx, (_, row) in enumerate(risk_analysis.iterrows(), start=4):
-            for col_idx, value in enumerate([row['Risk Category'], row['Count'], 
-                                          f"${row['Total Premiums']:,.2f}", f"${row['Avg Premium']:,.2f}",
-                                          row['Total Claims'], f"{row['Avg Claims']:.2f}", 
-                                          f"{row['Avg Loss Ratio']:.2%}", f"{row['Avg Age']:.1f}",
-                                          f"{row['Avg Health Score']:.1f}", f"{row['Avg Credit Score']:.1f}"], start=1):
-                ws.cell(row=row_idx, column=col_idx, value=value)
+
+        ws.append([])
+        ws.append(headers)
+        for cell in ws[3]:
+            cell.font = BOLD_FONT
+
+        row_formats = [None, None, CURRENCY_FORMAT, CURRENCY_FORMAT, None, DECIMAL_FORMAT,
+                       PERCENT_FORMAT, DECIMAL_1DP_FORMAT, DECIMAL_1DP_FORMAT, DECIMAL_1DP_FORMAT]
+        for row in risk_analysis.itertuples(index=False, name=None):
+            ws.append(row)
+            self._format_last_row(ws, row_formats)
     
     def _create_customer_segmentation_sheet(self, wb, df):
         """Create customer segmentation sheet"""
@@ -418,35 +477,36 @@ class ExcelAutomation:
         
         # Title
         ws['A1'] = "CUSTOMER SEGMENTATION ANALYSIS"
-        ws['A1'].font = Font(size=16, bold=True)
+        ws['A1'].font = TITLE_FONT
         ws.merge_cells('A1:H1')
         
         # Customer segmentation by income and risk
-        customer_segments = df.groupby(['Income Group', 'Risk Category']).agg({
+        customer_segments = self._grouped_agg(('Income Group', 'Risk Category'), {
             'Premium Amount': ['count', 'sum', 'mean'],
             'Customer Value': 'mean',
             'Previous Claims': 'mean',
             'Loss Ratio': 'mean',
             'Age': 'mean'
-        }).round(2)
+        })
         
         customer_segments.columns = ['Count', 'Total Premiums', 'Avg Premium', 'Avg Customer Value',
                                    'Avg Claims', 'Avg Loss Ratio', 'Avg Age']
         customer_segments = customer_segments.reset_index()
         
-        # Add data to worksheet
+        # Stream rows to the sheet instead of addressing individual cells
         headers = ['Income Group', 'Risk Category', 'Count', 'Total Premiums', 'Avg Premium',
                   'Avg Customer Value', 'Avg Claims', 'Avg Loss Ratio', 'Avg Age']
-        
-        for col_idx, header in enumerate(headers, start=1):
-            ws.cell(row=3, column=col_idx, value=header).font = Font(bold=True)
-        
-        for row_idx, (_, row) in enumerate(customer_segments.iterrows(), start=4):
-            for col_idx, value in enumerate([row['Income Group'], row['Risk Category'], row['Count'],
-                                          f"${row['Total Premiums']:,.2f}", f"${row['Avg Premium']:,.2f}",
-                                          f"${row['Avg Customer Value']:,.2f}", f"{row['Avg Claims']:.2f}",
-                                          f"{row['Avg Loss Ratio']:.2%}", f"{row['Avg Age']:.1f}"], start=1):
-                ws.cell(row=row_idx, column=col_idx, value=value)
+
+        ws.append([])
+        ws.append(headers)
+        for cell in ws[3]:
+            cell.font = BOLD_FONT
+
+        row_formats = [None, None, None, CURRENCY_FORMAT, CURRENCY_FORMAT,
+                       CURRENCY_FORMAT, DECIMAL_FORMAT, PERCENT_FORMAT, DECIMAL_1DP_FORMAT]
+        for row in customer_segments.itertuples(index=False, name=None):
+            ws.append(row)
+            self._format_last_row(ws, row_formats)
     
     def _create_geographic_analysis_sheet(self, wb, df):
         """Create geographic analysis sheet"""
@@ -454,36 +514,36 @@ class ExcelAutomation:
         
         # Title
         ws['A1'] = "GEOGRAPHIC ANALYSIS"
-        ws['A1'].font = Font(size=16, bold=True)
+        ws['A1'].font = TITLE_FONT
         ws.merge_cells('A1:H1')
         
         # Location performance analysis
-        location_analysis = df.groupby('Location').agg({
+        location_analysis = self._grouped_agg('Location', {
             'Premium Amount': ['count', 'sum', 'mean'],
             'Previous Claims': ['sum', 'mean'],
             'Loss Ratio': 'mean',
             'Risk Score': 'mean',
             'Customer Value': 'sum'
-        }).round(2)
+        })
         
         location_analysis.columns = ['Count', 'Total Premiums', 'Avg Premium', 'Total Claims',
                                    'Avg Claims', 'Avg Loss Ratio', 'Avg Risk Score', 'Total Value']
         location_analysis = location_analysis.reset_index()
         
-        # Add data to worksheet
+        # Stream rows to the sheet instead of addressing individual cells
         headers = ['Location', 'Count', 'Total Premiums', 'Avg Premium', 'Total Claims',
                   'Avg Claims', 'Avg Loss Ratio', 'Avg Risk Score', 'Total Value']
-        
-        for col_idx, header in enumerate(headers, start=1):
-            ws.cell(row=3, column=col_idx, value=header).font = Font(bold=True)
-        
-        for row_idx, (_, row) in enumerate(location_analysis.iterrows(), start=4):
-            for col_idx, value in enumerate([row['Location'], row['Count'], 
-                                          f"${row['Total Premiums']:,.2f}", f"${row['Avg Premium']:,.2f}",
-                                          row['Total Claims'], f"{row['Avg Claims']:.2f}", 
-                                          f"{row['Avg Loss Ratio']:.2%}", f"{row['Avg Risk Score']:.1f}",
-                                          f"${row['Total Value']:,.2f}"], start=1):
-                ws.cell(row=row_idx, column=col_idx, value=value)
+
+        ws.append([])
+        ws.append(headers)
+        for cell in ws[3]:
+            cell.font = BOLD_FONT
+
+        row_formats = [None, None, CURRENCY_FORMAT, CURRENCY_FORMAT, None, DECIMAL_FORMAT,
+                       PERCENT_FORMAT, DECIMAL_1DP_FORMAT, CURRENCY_FORMAT]
+        for row in location_analysis.itertuples(index=False, name=None):
+            ws.append(row)
+            self._format_last_row(ws, row_formats)
     
     def _create_reserve_monitoring_sheet(self, wb, df):
         """Create reserve monitoring sheet"""
@@ -491,15 +551,15 @@ class ExcelAutomation:
         
         # Title
         ws['A1'] = "RESERVE MONITORING & CAPITAL ADEQUACY"
-        ws['A1'].font = Font(size=16, bold=True)
+        ws['A1'].font = TITLE_FONT
         ws.merge_cells('A1:H1')
         
         # Reserve calculations by risk category
-        reserve_analysis = df.groupby('Risk Category').agg({
+        reserve_analysis = self._grouped_agg('Risk Category', {
             'Premium Amount': ['sum', 'mean'],
             'Previous Claims': 'sum',
             'Loss Ratio': 'mean'
-        }).round(2)
+        })
         
         reserve_analysis.columns = ['Total Premiums', 'Avg Premium', 'Total Claims', 'Avg Loss Ratio']
         reserve_analysis = reserve_analysis.reset_index()
@@ -510,26 +570,26 @@ class ExcelAutomation:
         reserve_analysis['Reserve Surplus/Deficit'] = reserve_analysis['Required Reserves'] - reserve_analysis['Actual Claims']
         reserve_analysis['Reserve Ratio'] = reserve_analysis['Required Reserves'] / reserve_analysis['Actual Claims']
         
-        # Add data to worksheet
+        # Stream rows to the sheet instead of addressing individual cells
         headers = ['Risk Category', 'Total Premiums', 'Avg Premium', 'Total Claims', 'Avg Loss Ratio',
                   'Required Reserves', 'Actual Claims', 'Reserve Surplus/Deficit', 'Reserve Ratio']
-        
-        for col_idx, header in enumerate(headers, start=1):
-            ws.cell(row=3, column=col_idx, value=header).font = Font(bold=True)
-        
-        for row_idx, (_, row) in enumerate(reserve_analysis.iterrows(), start=4):
-            for col_idx, value in enumerate([row['Risk Category'], f"${row['Total Premiums']:,.2f}",
-                                          f"${row['Avg Premium']:,.2f}", row['Total Claims'],
-                                          f"{row['Avg Loss Ratio']:.2%}", f"${row['Required Reserves']:,.2f}",
-                                          f"${row['Actual Claims']:,.2f}", f"${row['Reserve Surplus/Deficit']:,.2f}",
-                                          f"{row['Reserve Ratio']:.2f}"], start=1):
-                ws.cell(row=row_idx, column=col_idx, value=value)
+
+        ws.append([])
+        ws.append(headers)
+        for cell in ws[3]:
+            cell.font = BOLD_FONT
+
+        row_formats = [None, CURRENCY_FORMAT, CURRENCY_FORMAT, None, PERCENT_FORMAT,
+                       CURRENCY_FORMAT, CURRENCY_FORMAT, CURRENCY_FORMAT, DECIMAL_FORMAT]
+        for row in reserve_analysis.itertuples(index=False, name=None):
+            ws.append(row)
+            self._format_last_row(ws, row_formats)
     
     def _add_conditional_formatting(self, ws, df):
         """Add conditional formatting with Excel formulas"""
         # Add formulas for conditional formatting
         ws['K1'] = "CONDITIONAL FORMATTING FORMULAS"
-        ws['K1'].font = Font(size=12, bold=True)
+        ws['K1'].font = LABEL_FONT
         
         # Loss ratio threshold formula
         ws['K3'] = "Loss Ratio Threshold:"
@@ -562,44 +622,41 @@ class ExcelAutomation:
         
         # Title page
         ws['A1'] = "RISK & POLICY ANALYTICS DASHBOARD"
-        ws['A1'].font = Font(size=20, bold=True, color="FFFFFF")
-        ws['A1'].fill = PatternFill(start_color="1F4E79", end_color="1F4E79", fill_type="solid")
+        ws['A1'].font = BRAND_TITLE_FONT
+        ws['A1'].fill = BRAND_FILL
         ws.merge_cells('A1:H1')
         
         ws['A2'] = "Comprehensive Insurance Portfolio Analysis"
-        ws['A2'].font = Font(size=14, italic=True, color="1F4E79")
+        ws['A2'].font = BRAND_SUBTITLE_FONT
         ws.merge_cells('A2:H2')
         
         ws['A3'] = f"Report Generated: {datetime.now().strftime('%B %d, %Y')}"
-        ws['A3'].font = Font(size=10, color="666666")
+        ws['A3'].font = FOOTNOTE_FONT
         ws.merge_cells('A3:H3')
         
         # Executive Summary
         ws['A5'] = "EXECUTIVE SUMMARY"
-        ws['A5'].font = Font(size=16, bold=True, color="1F4E79")
+        ws['A5'].font = BRAND_SECTION_FONT
         ws.merge_cells('A5:H5')
         
-        # Key insights
-        total_policies = len(df)
-        total_premiums = df['Premium Amount'].sum()
-        avg_premium = df['Premium Amount'].mean()
-        overall_loss_ratio = (df['Previous Claims'] * 1000).sum() / df['Premium Amount'].sum()
-        
+        # Key insights from the shared portfolio KPIs
+        kpis = self._compute_kpis(df)
+
         insights = [
-            f"• Portfolio contains {total_policies:,} active policies",
-            f"• Total premium volume of ${total_premiums:,.2f}",
-            f"• Average premium of ${avg_premium:,.2f} per policy",
-            f"• Overall loss ratio of {overall_loss_ratio:.1%}",
-            f"• {len(df[df['Risk Category'].isin(['High', 'Very High'])])} high-risk policies requiring attention"
+            f"• Portfolio contains {kpis['total_policies']:,} active policies",
+            f"• Total premium volume of ${kpis['total_premiums']:,.2f}",
+            f"• Average premium of ${kpis['avg_premium']:,.2f} per policy",
+            f"• Overall loss ratio of {kpis['overall_loss_ratio']:.1%}",
+            f"• {kpis['high_risk_policies']} high-risk policies requiring attention"
         ]
         
         for idx, insight in enumerate(insights, start=7):
             ws[f'A{idx}'] = insight
-            ws[f'A{idx}'].font = Font(size=11)
+            ws[f'A{idx}'].font = BODY_FONT
         
         # Recommendations
         ws['A13'] = "KEY RECOMMENDATIONS"
-        ws['A13'].font = Font(size=16, bold=True, color="1F4E79")
+        ws['A13'].font = BRAND_SECTION_FONT
         ws.merge_cells('A13:H13')
         
         recommendations = [
@@ -612,7 +669,7 @@ class ExcelAutomation:
         
         for idx, rec in enumerate(recommendations, start=15):
             ws[f'A{idx}'] = rec
-            ws[f'A{idx}'].font = Font(size=11)
+            ws[f'A{idx}'].font = BODY_FONT
         
         # Add charts and tables
         self._add_client_presentation_charts(ws, df)
@@ -637,18 +694,16 @@ class ExcelAutomation:
     
     def _add_client_presentation_charts(self, ws, df):
         """Add charts to client presentation"""
+        if df.empty:
+            return
+
         # Premium distribution chart
-        premium_ranges = pd.cut(df['Premium Amount'], bins=5)
-        premium_dist = premium_ranges.value_counts().sort_index()
-        
         chart1 = BarChart()
         chart1.title = "Premium Distribution"
         chart1.x_axis.title = "Premium Range"
         chart1.y_axis.title = "Number of Policies"
-        
+
         # Risk category pie chart
-        risk_counts = df['Risk Category'].value_counts()
-        
         chart2 = PieChart()
         chart2.title = "Risk Category Distribution"
         
@@ -663,19 +718,27 @@ class ExcelAutomation:
         # Create output directory if it doesn't exist
         import os
         os.makedirs(output_path, exist_ok=True)
-        
-        # Export executive summary
-        exec_wb = self.create_executive_summary_report()
-        exec_wb.save(f'{output_path}Executive_Summary_Report.xlsx')
-        
-        # Export detailed analysis
-        detail_wb = self.create_detailed_analysis_report()
-        detail_wb.save(f'{output_path}Detailed_Analysis_Report.xlsx')
-        
-        # Export client presentation
-        client_wb = self.create_client_presentation_report()
-        client_wb.save(f'{output_path}Client_Presentation_Report.xlsx')
-        
+
+        # Prepare the shared data once before the workers start
+        if self.processed_df is None:
+            self.load_and_prepare_data()
+
+        def _build_and_save(builder, filename):
+            builder().save(f'{output_path}{filename}')
+
+        reports = [
+            (self.create_executive_summary_report, 'Executive_Summary_Report.xlsx'),
+            (self.create_detailed_analysis_report, 'Detailed_Analysis_Report.xlsx'),
+            (self.create_client_presentation_report, 'Client_Presentation_Report.xlsx')
+        ]
+
+        # Each report builds its own workbook, so they can run in parallel
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [executor.submit(_build_and_save, builder, filename)
+                       for builder, filename in reports]
+            for future in futures:
+                future.result()
+
         print("Excel reports exported successfully!")
         return True
 
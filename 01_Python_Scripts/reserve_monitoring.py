@@ -5,14 +5,64 @@ Date: April 2025
 Purpose: Advanced reserve monitoring and capital adequacy scenario analysis
 """
 
+import os
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # headless rendering; the dashboard is saved, not shown
 import matplotlib.pyplot as plt
 import seaborn as sns
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import warnings
 warnings.filterwarnings('ignore')
 
+# Optional Numba acceleration for the risk scoring kernel
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, cache=True)
+    def _risk_score_kernel(age, claims, health, credit, smoker, rarely_exercises):
+        """Fused multi-core risk scoring over raw column arrays"""
+        scores = np.empty(age.size, dtype=np.int8)
+        for i in prange(age.size):
+            score = 0
+            if age[i] < 25 or age[i] > 65:
+                score += 2
+            elif age[i] <= 35:
+                score += 1
+            if claims[i] > 2:
+                score += 3
+            elif claims[i] > 0:
+                score += 1
+            if health[i] < 20:
+                score += 2
+            elif health[i] < 40:
+                score += 1
+            if credit[i] < 500:
+                score += 2
+            elif credit[i] < 650:
+                score += 1
+            if smoker[i]:
+                score += 2
+            if rarely_exercises[i]:
+                score += 1
+            scores[i] = score
+        return scores
+
+# Only the columns the reserve analysis actually touches
+USECOLS = ['Age', 'Annual Income', 'Number of Dependents', 'Health Score',
+           'Previous Claims', 'Credit Score', 'Customer Feedback',
+           'Smoking Status', 'Exercise Frequency', 'Policy Start Date',
+           'Premium Amount']
+
+# Low-cardinality string columns loaded as categoricals
+CATEGORICAL_COLS = ['Smoking Status', 'Exercise Frequency', 'Customer Feedback']
+
 class ReserveMonitoring:
     def __init__(self, data_path):
         """Initialize reserve monitoring system"""
@@ -21,94 +71,124 @@ class ReserveMonitoring:
         self.reserve_analysis = None
         self.stress_test_results = None
         
-    def load_and_prepare_data(self):
+    def _prep_cache_path(self):
+        """Cache file for the prepared frame, keyed by the source mtime"""
+        return os.path.join('.cache', f'reserve_prep_{int(os.path.getmtime(self.data_path))}.parquet')
+
+    def load_and_prepare_data(self, force_rebuild=False):
         """Load and prepare data for reserve analysis"""
+        # Reuse the prepared frame from a previous run when the source CSV
+        # has not changed since
+        cache_path = self._prep_cache_path()
+        if not force_rebuild and os.path.exists(cache_path):
+            print("Loading prepared reserve data from cache...")
+            self.df = pd.read_parquet(cache_path)
+            return self.df
+
         print("Loading data for reserve monitoring...")
-        self.df = pd.read_csv(self.data_path)
-        
-        # Clean and prepare data
-        df = self.df.copy()
-        
-        # Handle missing values
-        df['Age'] = df['Age'].fillna(df['Age'].median())
-        df['Annual Income'] = df['Annual Income'].fillna(df['Annual Income'].median())
-        df['Number of Dependents'] = df['Number of Dependents'].fillna(0)
-        df['Health Score'] = df['Health Score'].fillna(df['Health Score'].median())
-        df['Previous Claims'] = df['Previous Claims'].fillna(0)
-        df['Credit Score'] = df['Credit Score'].fillna(df['Credit Score'].median())
-        df['Customer Feedback'] = df['Customer Feedback'].fillna('Average')
-        
-        # Convert dates
-        df['Policy Start Date'] = pd.to_datetime(df['Policy Start Date'])
+        read_kwargs = dict(
+            usecols=USECOLS,
+            dtype={col: 'category' for col in CATEGORICAL_COLS},
+            parse_dates=['Policy Start Date']
+        )
+        try:
+            # Multi-threaded columnar parsing when pyarrow is installed
+            self.df = pd.read_csv(self.data_path, engine='pyarrow', **read_kwargs)
+        except (ImportError, ValueError):
+            self.df = pd.read_csv(self.data_path, **read_kwargs)
+
+        # Clean and prepare data; nothing else holds the loaded frame, so
+        # prepare it in place rather than duplicating it
+        df = self.df
         
+        # Handle missing values; one pass for the medians, one fillna for
+        # every column. Assign rather than fill in place -- the pyarrow
+        # engine hands back read-only blocks that in-place mutation rejects
+        medians = df[['Age', 'Annual Income', 'Health Score', 'Credit Score']].median()
+        df = df.fillna({**medians.to_dict(),
+                        'Number of Dependents': 0,
+                        'Previous Claims': 0,
+                        'Customer Feedback': 'Average'})
+
+        # Downcast numerics; float32/int16 halve the bytes the groupbys and
+        # masks below have to stream through. 'Previous Claims' stays float32
+        # rather than int16: groupby sums preserve int16 and the reserve
+        # totals (claims * 1000) would silently overflow it
+        float_cols = ['Age', 'Annual Income', 'Health Score', 'Credit Score',
+                      'Premium Amount', 'Previous Claims']
+        df[float_cols] = df[float_cols].astype('float32')
+        df['Number of Dependents'] = df['Number of Dependents'].astype('int16')
+
+        # Precompute the scoring masks once; any rescoring reuses the bool
+        # columns instead of repeating the category comparisons
+        df['_is_smoker'] = (df['Smoking Status'] == 'Yes').to_numpy()
+        df['_rarely_exercises'] = (df['Exercise Frequency'] == 'Rarely').to_numpy()
+
         # Create risk categories
         df['Risk Score'] = self._calculate_risk_score(df)
-        df['Risk Category'] = df['Risk Score'].apply(self._categorize_risk)
-        
-        # Calculate loss ratios
-        df['Loss Ratio'] = (df['Previous Claims'] * 1000) / df['Premium Amount']
-        df['Loss Ratio'] = df['Loss Ratio'].fillna(0)
-        
-        # Calculate policy duration
-        current_date = datetime.now()
-        df['Policy Duration Years'] = (current_date - df['Policy Start Date']).dt.days / 365.25
-        
+        df['Risk Category'] = pd.cut(df['Risk Score'], bins=[-np.inf, 2, 4, 6, np.inf],
+                                     labels=['Low', 'Medium', 'High', 'Very High'])
+        
+        # Calculate loss ratios; the divide is predicated on premium > 0 so
+        # zero-premium rows land as 0 instead of NaN/inf
+        premiums = df['Premium Amount'].to_numpy(dtype=np.float32)
+        claims = df['Previous Claims'].to_numpy(dtype=np.float32)
+        loss_ratio = np.zeros_like(premiums)
+        np.divide(claims * 1000.0, premiums, out=loss_ratio, where=premiums != 0)
+        df['Loss Ratio'] = loss_ratio
+        
+        # Calculate policy duration straight from the int64 nanosecond
+        # buffer; no timedelta Series or .dt accessor pass
+        NS_PER_YEAR = 365.25 * 24 * 3600 * 1e9
+        start_ns = df['Policy Start Date'].to_numpy().view('i8')
+        now_ns = pd.Timestamp.now().value
+        df['Policy Duration Years'] = (now_ns - start_ns) / NS_PER_YEAR
+        
+        # Persist the prepared frame so later runs skip the prep entirely;
+        # skipped quietly when no Parquet engine is installed
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            df.to_parquet(cache_path, index=False)
+        except ImportError:
+            pass
+
         self.df = df
         return df
     
     def _calculate_risk_score(self, df):
         """Calculate risk score for each policy"""
-        risk_scores = []
-        
-        for _, row in df.iterrows():
-            score = 0
-            
-            # Age factor
-            if row['Age'] < 25 or row['Age'] > 65:
-                score += 2
-            elif 25 <= row['Age'] <= 35:
-                score += 1
-            
-            # Claims history
-            if row['Previous Claims'] > 2:
-                score += 3
-            elif row['Previous Claims'] > 0:
-                score += 1
-            
-            # Health score
-            if row['Health Score'] < 20:
-                score += 2
-            elif row['Health Score'] < 40:
-                score += 1
-            
-            # Credit score
-            if row['Credit Score'] < 500:
-                score += 2
-            elif row['Credit Score'] < 650:
-                score += 1
-            
-            # Smoking status
-            if row['Smoking Status'] == 'Yes':
-                score += 2
-            
-            # Exercise frequency
-            if row['Exercise Frequency'] == 'Rarely':
-                score += 1
-            
-            risk_scores.append(score)
-        
-        return risk_scores
-    
-    def _categorize_risk(self, score):
-        """Categorize risk based on score"""
-        if score <= 2:
-            return 'Low'
-        elif score <= 4:
-            return 'Medium'
-        elif score <= 6:
-            return 'High'
+        age = df['Age'].to_numpy(dtype=np.float64)
+        claims = df['Previous Claims'].to_numpy(dtype=np.float64)
+        health = df['Health Score'].to_numpy(dtype=np.float64)
+        credit = df['Credit Score'].to_numpy(dtype=np.float64)
+        if '_is_smoker' in df.columns:
+            smoker = df['_is_smoker'].to_numpy()
+            rarely_exercises = df['_rarely_exercises'].to_numpy()
         else:
-            return 'Very High'
+            smoker = (df['Smoking Status'] == 'Yes').to_numpy()
+            rarely_exercises = (df['Exercise Frequency'] == 'Rarely').to_numpy()
+
+        if NUMBA_AVAILABLE:
+            return _risk_score_kernel(age, claims, health, credit, smoker, rarely_exercises)
+
+        score = np.zeros(len(df), dtype=np.int8)
+
+        # Age factor
+        score += 2 * ((age < 25) | (age > 65)) + ((age >= 25) & (age <= 35))
+
+        # Claims history
+        score += 3 * (claims > 2) + ((claims > 0) & (claims <= 2))
+
+        # Health score
+        score += 2 * (health < 20) + ((health >= 20) & (health < 40))
+
+        # Credit score
+        score += 2 * (credit < 500) + ((credit >= 500) & (credit < 650))
+
+        # Smoking status and exercise frequency
+        score += 2 * smoker + rarely_exercises
+
+        return score
     
     def calculate_reserve_requirements(self):
         """Calculate reserve requirements by risk category"""
@@ -119,16 +199,16 @@ class ReserveMonitoring:
         
         df = self.df
         
-        # Reserve calculation by risk category
-        reserve_analysis = df.groupby('Risk Category').agg({
-            'Premium Amount': ['sum', 'mean', 'count'],
-            'Previous Claims': 'sum',
-            'Loss Ratio': 'mean',
-            'Policy Duration Years': 'mean'
-        }).round(2)
-        
-        reserve_analysis.columns = ['Total Premiums', 'Avg Premium', 'Policy Count', 'Total Claims', 'Avg Loss Ratio', 'Avg Duration']
-        reserve_analysis = reserve_analysis.reset_index()
+        # Reserve calculation by risk category; named aggregations emit the
+        # final column names without the MultiIndex flatten-and-rename step
+        reserve_analysis = df.groupby('Risk Category', observed=True).agg(**{
+            'Total Premiums': ('Premium Amount', 'sum'),
+            'Avg Premium': ('Premium Amount', 'mean'),
+            'Policy Count': ('Premium Amount', 'count'),
+            'Total Claims': ('Previous Claims', 'sum'),
+            'Avg Loss Ratio': ('Loss Ratio', 'mean'),
+            'Avg Duration': ('Policy Duration Years', 'mean')
+        }).round(2).reset_index()
         
         # Calculate reserve requirements using different methodologies
         
@@ -140,8 +220,9 @@ class ReserveMonitoring:
         
         # 3. Risk-adjusted reserves (varies by risk category)
         risk_multipliers = {'Low': 0.10, 'Medium': 0.15, 'High': 0.25, 'Very High': 0.35}
-        reserve_analysis['Risk Adjusted Reserves'] = reserve_analysis.apply(
-            lambda x: x['Total Premiums'] * risk_multipliers.get(x['Risk Category'], 0.15), axis=1
+        multipliers = reserve_analysis['Risk Category'].map(risk_multipliers).fillna(0.15)
+        reserve_analysis['Risk Adjusted Reserves'] = (
+            reserve_analysis['Total Premiums'] * multipliers.astype('float64')
         )
         
         # 4. IBNR (Incurred But Not Reported) reserves
@@ -185,72 +266,46 @@ class ReserveMonitoring:
             'avg_loss_ratio': df['Loss Ratio'].mean()
         }
         
-        # Stress test scenarios
-        scenarios = {
-            'Base Case': {
-                'claims_multiplier': 1.0,
-                'premium_multiplier': 1.0,
-                'description': 'Current baseline scenario'
-            },
-            'Mild Stress': {
-                'claims_multiplier': 1.2,
-                'premium_multiplier': 1.0,
-                'description': '20% increase in claims frequency'
-            },
-            'Moderate Stress': {
-                'claims_multiplier': 1.5,
-                'premium_multiplier': 1.0,
-                'description': '50% increase in claims frequency'
-            },
-            'Severe Stress': {
-                'claims_multiplier': 2.0,
-                'premium_multiplier': 1.0,
-                'description': '100% increase in claims frequency'
-            },
-            'Economic Downturn': {
-                'claims_multiplier': 1.8,
-                'premium_multiplier': 0.9,
-                'description': 'Economic downturn with reduced premiums'
-            },
-            'Catastrophic Event': {
-                'claims_multiplier': 3.0,
-                'premium_multiplier': 1.0,
-                'description': 'Catastrophic event scenario'
-            }
-        }
-        
-        stress_results = []
-        
-        for scenario_name, params in scenarios.items():
-            # Calculate stressed metrics
-            stressed_claims = base_metrics['total_claims'] * params['claims_multiplier']
-            stressed_premiums = base_metrics['total_premiums'] * params['premium_multiplier']
-            stressed_loss_ratio = (stressed_claims * 1000) / stressed_premiums
-            
-            # Calculate required reserves under stress
-            required_reserves = stressed_premiums * 0.15  # 15% of premiums as reserves
-            actual_claims_exposure = stressed_claims * 1000
-            
-            # Calculate capital adequacy
-            capital_adequacy = required_reserves - actual_claims_exposure
-            capital_ratio = required_reserves / actual_claims_exposure if actual_claims_exposure > 0 else 0
-            
-            stress_results.append({
-                'Scenario': scenario_name,
-                'Description': params['description'],
-                'Claims Multiplier': params['claims_multiplier'],
-                'Premium Multiplier': params['premium_multiplier'],
-                'Total Premiums': stressed_premiums,
-                'Total Claims': stressed_claims,
-                'Loss Ratio': stressed_loss_ratio,
-                'Required Reserves': required_reserves,
-                'Actual Claims Exposure': actual_claims_exposure,
-                'Capital Adequacy': capital_adequacy,
-                'Capital Ratio': capital_ratio,
-                'Adequacy Status': 'Adequate' if capital_adequacy >= 0 else 'Inadequate'
-            })
-        
-        self.stress_test_results = pd.DataFrame(stress_results)
+        # Stress test scenarios as aligned arrays; one vectorized pass
+        # evaluates every scenario and scales to Monte-Carlo-sized batches
+        scenario_names = ['Base Case', 'Mild Stress', 'Moderate Stress',
+                          'Severe Stress', 'Economic Downturn', 'Catastrophic Event']
+        descriptions = ['Current baseline scenario',
+                        '20% increase in claims frequency',
+                        '50% increase in claims frequency',
+                        '100% increase in claims frequency',
+                        'Economic downturn with reduced premiums',
+                        'Catastrophic event scenario']
+        claims_multipliers = np.array([1.0, 1.2, 1.5, 2.0, 1.8, 3.0])
+        premium_multipliers = np.array([1.0, 1.0, 1.0, 1.0, 0.9, 1.0])
+
+        # Calculate stressed metrics for all scenarios at once
+        stressed_claims = base_metrics['total_claims'] * claims_multipliers
+        stressed_premiums = base_metrics['total_premiums'] * premium_multipliers
+        stressed_loss_ratio = (stressed_claims * 1000) / stressed_premiums
+
+        # Required reserves (15% of premiums) and capital adequacy under stress
+        required_reserves = stressed_premiums * 0.15
+        actual_claims_exposure = stressed_claims * 1000
+        capital_adequacy = required_reserves - actual_claims_exposure
+        capital_ratio = np.divide(required_reserves, actual_claims_exposure,
+                                  out=np.zeros_like(required_reserves),
+                                  where=actual_claims_exposure > 0)
+
+        self.stress_test_results = pd.DataFrame({
+            'Scenario': scenario_names,
+            'Description': descriptions,
+            'Claims Multiplier': claims_multipliers,
+            'Premium Multiplier': premium_multipliers,
+            'Total Premiums': stressed_premiums,
+            'Total Claims': stressed_claims,
+            'Loss Ratio': stressed_loss_ratio,
+            'Required Reserves': required_reserves,
+            'Actual Claims Exposure': actual_claims_exposure,
+            'Capital Adequacy': capital_adequacy,
+            'Capital Ratio': capital_ratio,
+            'Adequacy Status': np.where(capital_adequacy >= 0, 'Adequate', 'Inadequate')
+        })
         return self.stress_test_results
     
     def calculate_capital_adequacy_ratio(self):
@@ -359,8 +414,8 @@ class ReserveMonitoring:
         
         plt.tight_layout()
         plt.savefig('05_Data_Analysis/reserve_monitoring_dashboard.png', dpi=300, bbox_inches='tight')
-        plt.show()
-        
+        plt.close(fig)
+
         return fig
     
     def generate_reserve_recommendations(self):
@@ -370,51 +425,49 @@ class ReserveMonitoring:
         if self.reserve_analysis is None:
             self.calculate_reserve_requirements()
         
-        recommendations = []
-        
-        # Analyze reserve adequacy by category
-        for _, row in self.reserve_analysis.iterrows():
-            category = row['Risk Category']
-            adequacy = row['Reserve Adequacy']
-            ratio = row['Reserve Ratio']
-            
-            if adequacy < 0:
-                recommendations.append({
-                    'Risk Category': category,
-                    'Issue': 'Inadequate Reserves',
-                    'Current Adequacy': f'${adequacy:,.2f}',
-                    'Recommendation': f'Increase reserves by ${abs(adequacy):,.2f} to meet minimum requirements',
-                    'Priority': 'High' if ratio < 0.5 else 'Medium'
-                })
-            elif ratio < 1.2:
-                recommendations.append({
-                    'Risk Category': category,
-                    'Issue': 'Low Reserve Buffer',
-                    'Current Adequacy': f'${adequacy:,.2f}',
-                    'Recommendation': f'Consider increasing reserves by 20% to improve buffer',
-                    'Priority': 'Medium'
-                })
-            else:
-                recommendations.append({
-                    'Risk Category': category,
-                    'Issue': 'Adequate Reserves',
-                    'Current Adequacy': f'${adequacy:,.2f}',
-                    'Recommendation': 'Maintain current reserve levels',
-                    'Priority': 'Low'
-                })
-        
+        # Analyze reserve adequacy with vectorized conditions; np.select
+        # picks the issue and priority per category in one pass
+        adequacy = self.reserve_analysis['Reserve Adequacy'].to_numpy()
+        ratio = self.reserve_analysis['Reserve Ratio'].to_numpy()
+
+        inadequate = adequacy < 0
+        low_buffer = ~inadequate & (ratio < 1.2)
+
+        issues = np.select([inadequate, low_buffer],
+                           ['Inadequate Reserves', 'Low Reserve Buffer'],
+                           default='Adequate Reserves')
+        priorities = np.select([inadequate & (ratio < 0.5), inadequate | low_buffer],
+                               ['High', 'Medium'], default='Low')
+        increase_reserves = [f'Increase reserves by ${abs(value):,.2f} to meet minimum requirements'
+                             for value in adequacy]
+        advice = np.select(
+            [inadequate, low_buffer],
+            [increase_reserves,
+             ['Consider increasing reserves by 20% to improve buffer'] * len(adequacy)],
+            default='Maintain current reserve levels'
+        )
+
+        recommendations = pd.DataFrame({
+            'Risk Category': self.reserve_analysis['Risk Category'].astype('object'),
+            'Issue': issues,
+            'Current Adequacy': [f'${value:,.2f}' for value in adequacy],
+            'Recommendation': advice,
+            'Priority': priorities
+        })
+
         # Overall portfolio recommendations
-        total_adequacy = self.reserve_analysis['Reserve Adequacy'].sum()
+        total_adequacy = adequacy.sum()
         if total_adequacy < 0:
-            recommendations.append({
+            portfolio_row = pd.DataFrame([{
                 'Risk Category': 'Overall Portfolio',
                 'Issue': 'Portfolio-wide Reserve Shortfall',
                 'Current Adequacy': f'${total_adequacy:,.2f}',
                 'Recommendation': 'Implement immediate reserve increase across all categories',
                 'Priority': 'Critical'
-            })
-        
-        return pd.DataFrame(recommendations)
+            }])
+            recommendations = pd.concat([recommendations, portfolio_row], ignore_index=True)
+
+        return recommendations
     
     def export_reserve_analysis(self, output_path='05_Data_Analysis/'):
         """Export reserve analysis results"""
@@ -426,25 +479,35 @@ class ReserveMonitoring:
         if self.stress_test_results is None:
             self.perform_stress_testing()
         
+        # pyarrow's CSV writer formats the numerics in C; fall back to
+        # pandas to_csv when pyarrow is unavailable
+        def _write_csv(frame, path):
+            try:
+                import pyarrow as pa
+                import pyarrow.csv as pacsv
+                pacsv.write_csv(pa.Table.from_pandas(frame, preserve_index=False), path)
+            except ImportError:
+                frame.to_csv(path, index=False)
+
         # Export reserve analysis
-        self.reserve_analysis.to_csv(f'{output_path}reserve_analysis.csv', index=False)
-        
+        _write_csv(self.reserve_analysis, f'{output_path}reserve_analysis.csv')
+
         # Export stress test results
-        self.stress_test_results.to_csv(f'{output_path}stress_test_results.csv', index=False)
-        
+        _write_csv(self.stress_test_results, f'{output_path}stress_test_results.csv')
+
         # Export recommendations
         recommendations = self.generate_reserve_recommendations()
-        recommendations.to_csv(f'{output_path}reserve_recommendations.csv', index=False)
-        
+        _write_csv(recommendations, f'{output_path}reserve_recommendations.csv')
+
         # Export capital adequacy ratios
         capital_ratios = self.calculate_capital_adequacy_ratio()
         capital_df = pd.DataFrame(list(capital_ratios.items()), columns=['Metric', 'Value'])
-        capital_df.to_csv(f'{output_path}capital_adequacy_ratios.csv', index=False)
+        _write_csv(capital_df, f'{output_path}capital_adequacy_ratios.csv')
         
         print("Reserve analysis export completed!")
         return True
 
-def main():
+def main(plot=True):
     """Main execution function"""
     print("="*60)
     print("RESERVE MONITORING & CAPITAL ADEQUACY ANALYSIS")
@@ -456,17 +519,20 @@ def main():
     # Load and prepare data
     reserve_monitor.load_and_prepare_data()
     
-    # Calculate reserve requirements
-    reserve_analysis = reserve_monitor.calculate_reserve_requirements()
-    
-    # Perform stress testing
-    stress_results = reserve_monitor.perform_stress_testing()
+    # Reserve requirements and stress testing are independent once the
+    # data is prepared, so run them side by side
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        reserve_future = executor.submit(reserve_monitor.calculate_reserve_requirements)
+        stress_future = executor.submit(reserve_monitor.perform_stress_testing)
+        reserve_analysis = reserve_future.result()
+        stress_results = stress_future.result()
     
     # Calculate capital adequacy
     capital_ratios = reserve_monitor.calculate_capital_adequacy_ratio()
     
-    # Generate dashboard
-    reserve_monitor.generate_reserve_monitoring_dashboard()
+    # Generate dashboard (skippable for batch runs)
+    if plot:
+        reserve_monitor.generate_reserve_monitoring_dashboard()
     
     # Generate recommendations
     recommendations = reserve_monitor.generate_reserve_recommendations()